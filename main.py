@@ -1,12 +1,14 @@
 #main.py
 import streamlit as st
 import os
+import time
+import asyncio
+import hashlib
+import threading
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from dotenv import load_dotenv
-from src.agents.summarizer_agent import SummarizerAgent
-from src.agents.flashcard_agent import FlashcardAgent
-from src.agents.planner_agent import PlannerAgent
-from src.agents.quiz_agent import QuizAgent
-from src.agents.tracker_agent import TrackerAgent
 
 # Load environment variables
 load_dotenv()
@@ -20,7 +22,9 @@ st.set_page_config(
 )
 
 # Custom CSS for professional styling
-st.markdown("""
+@st.cache_data
+def _css() -> str:
+    return """
     <style>
     /* Import Google Fonts */
     @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap');
@@ -196,9 +200,399 @@ st.markdown("""
         border-radius: 8px;
     }
     </style>
-""", unsafe_allow_html=True)
+"""
+
+# Streamlit drops elements that are not re-emitted on a rerun, so the style
+# block is still written every run - only building the string is cached
+st.markdown(_css(), unsafe_allow_html=True)
+
+# Cached agent factories - each agent is built once per process and reused
+# across reruns and sessions instead of re-initializing the Gemini client.
+# Agent modules are imported lazily so their heavy dependencies (Gemini SDK,
+# PDF/DOCX parsers, plotting) only load when a tab first needs them.
+@st.cache_resource
+def get_planner():
+    from src.agents.planner_agent import PlannerAgent
+    return PlannerAgent()
+
+@st.cache_resource
+def get_flashcard_agent():
+    from src.agents.flashcard_agent import FlashcardAgent
+    return FlashcardAgent()
+
+@st.cache_resource
+def get_summarizer():
+    from src.agents.summarizer_agent import SummarizerAgent
+    return SummarizerAgent()
+
+@st.cache_resource
+def get_quiz_agent():
+    from src.agents.quiz_agent import QuizAgent
+    return QuizAgent()
+
+@st.cache_resource
+def get_tracker():
+    from src.agents.tracker_agent import TrackerAgent
+    return TrackerAgent()
+
+@st.cache_resource
+def get_executor():
+    """Process-wide worker pool for blocking agent calls; also caps concurrent Gemini work."""
+    return ThreadPoolExecutor(max_workers=16)
+
+@st.cache_resource
+def warm_gemini():
+    """Import the agents' Gemini stack and open its connection once per server process, off the script thread."""
+    def warm():
+        try:
+            from src.agents.gemini_model import get_model
+            get_model().generate_content("ok", generation_config={"max_output_tokens": 1})
+        except Exception:
+            # Best effort only - real requests report configuration and API errors themselves
+            pass
+    
+    return get_executor().submit(warm)
+
+def run_in_background(fn, *args, on_poll=None):
+    """Run a blocking agent call on the shared executor while the script thread reports progress.
+    
+    on_poll, if given, is called from the script thread on every poll to render partial results.
+    """
+    ctx = get_script_run_ctx()
+    
+    def task():
+        # Let the agent's own st.* progress messages reach this session
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return fn(*args)
+    
+    future = get_executor().submit(task)
+    status = st.empty()
+    started = time.monotonic()
+    while not future.done():
+        status.caption(f"⏳ Working... {time.monotonic() - started:.0f}s elapsed")
+        if on_poll:
+            on_poll()
+        time.sleep(0.1)
+    status.empty()
+    return future.result()
+
+def input_fingerprint(*values) -> str:
+    """Fingerprint generation inputs so an unchanged request can reuse the last result."""
+    digest = hashlib.sha1()
+    for value in values:
+        digest.update(value if isinstance(value, bytes) else repr(value).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+def extract_text(file_bytes: bytes, file_name: str) -> str:
+    """Extract document text via the cached extractor, importing the parsers on first use."""
+    from src.agents.text_extractor import extract_text as cached_extract_text
+    return cached_extract_text(file_bytes, file_name)
+
+@st.fragment
+def render_flashcards_tab():
+    """Flashcard Generator tab; its widgets rerun only this fragment."""
+    st.markdown("<div class='tab-header'><h2>🃏 Flashcard Generator</h2><p>Transform your documents into study flashcards</p></div>", unsafe_allow_html=True)
+    
+    # Create two columns for layout
+    col1, col2 = st.columns([1, 1.5])
+    
+    with col1:
+        st.markdown("### Upload & Options")
+        
+        # File upload section
+        with st.container():
+            st.markdown("<div class='upload-section'>", unsafe_allow_html=True)
+            flashcard_file = st.file_uploader(
+                "Choose a document for flashcards",
+                type=['pdf', 'docx'],
+                help="Upload PDF or DOCX files (max 10MB)",
+                key="flashcard_uploader"
+            )
+            st.markdown("</div>", unsafe_allow_html=True)
+        
+        # Flashcard options
+        if flashcard_file:
+            st.markdown("### Flashcard Options")
+            
+            # Options live in a form so changing them does not rerun the whole app
+            with st.form("flashcard_form"):
+                num_cards = st.number_input(
+                    "Number of Flashcards",
+                    min_value=1,
+                    max_value=50,
+                    value=10,
+                    help="How many flashcards do you want to generate?"
+                )
+                
+                difficulty = st.selectbox(
+                    "Difficulty Level",
+                    ["Basic", "Intermediate", "Advanced"],
+                    index=1,
+                    help="Choose the complexity level for your flashcards"
+                )
+                
+                st.markdown("### Study Options")
+                
+                shuffle_cards = st.checkbox(
+                    "🔀 Shuffle flashcards",
+                    help="Randomize the order of flashcards for better learning"
+                )
+                
+                # Generate flashcards button
+                generate_flashcards_btn = st.form_submit_button("🃏 Generate Flashcards", type="primary", use_container_width=True)
+    
+    with col2:
+        st.markdown("### Generated Flashcards")
+        
+        # Flashcards display container
+        flashcards_container = st.container()
+        
+        if flashcard_file:
+            # Display file info
+            file_details = {
+                "Filename": flashcard_file.name,
+                "File Type": flashcard_file.type,
+                "File Size": f"{flashcard_file.size / 1024:.2f} KB"
+            }
+            
+            with st.expander("📋 File Details"):
+                for key, value in file_details.items():
+                    st.write(f"**{key}:** {value}")
+            
+            # Process and display flashcards
+            if 'generate_flashcards_btn' in locals() and generate_flashcards_btn:
+                try:
+                    with st.spinner("🔄 Processing document and generating flashcards..."):
+                        # Get shared flashcard agent
+                        flashcard_agent = get_flashcard_agent()
+                        
+                        flashcards_key = input_fingerprint(flashcard_file.getvalue(), num_cards, difficulty)
+                        
+                        if st.session_state.get('flashcards_key') == flashcards_key and st.session_state.get('flashcards'):
+                            # Same document and options - reuse the last deck instead of calling Gemini again
+                            flashcards = st.session_state.flashcards
+                        else:
+                            # Extract text once per unique file (cached on file bytes)
+                            flashcard_text = extract_text(flashcard_file.getvalue(), flashcard_file.name)
+                            
+                            # Generate flashcards, previewing each card as soon as Gemini finishes it
+                            streamed_cards = []
+                            rendered_count = [0]
+                            preview = st.empty()
+                            
+                            def show_streamed_cards():
+                                if len(streamed_cards) > rendered_count[0]:
+                                    rendered_count[0] = len(streamed_cards)
+                                    preview.markdown("\n\n".join(
+                                        f"**{card['term']}** - {card['definition']}" for card in streamed_cards
+                                    ))
+                            
+                            flashcards = run_in_background(asyncio.run, flashcard_agent.agenerate_flashcards(
+                                flashcard_text, 
+                                num_cards, 
+                                difficulty,
+                                on_card=streamed_cards.append
+                            ), on_poll=show_streamed_cards)
+                            preview.empty()
+                            st.session_state.flashcards = flashcards
+                            st.session_state.flashcards_key = flashcards_key
+                        
+                        # Shuffling only reorders the deck, so it is applied after the reuse check
+                        if shuffle_cards:
+                            flashcards = flashcard_agent.shuffle_flashcards(flashcards)
+                        
+                        # Display flashcards
+                        with flashcards_container:
+                            if flashcards:
+                                st.markdown("<div class='summary-container'>", unsafe_allow_html=True)
+                                
+                                # Display count and info
+                                st.success(f"✅ Generated {len(flashcards)} flashcards successfully!")
+                                
+                                # Display flashcards as a single markdown element
+                                st.markdown("\n\n".join(
+                                    f"### 🃏 Card {i}\n\n**Term:** {card['term']}\n\n**Definition:** {card['definition']}\n\n---"
+                                    for i, card in enumerate(flashcards, 1)
+                                ))
+                                
+                                st.markdown("</div>", unsafe_allow_html=True)
+                                
+                                # Download button - the print version is only built when clicked
+                                st.download_button(
+                                    label="🖨️ Download Print-Friendly Version",
+                                    data=partial(flashcard_agent.format_flashcards_for_print, flashcards, flashcard_file.name),
+                                    file_name=f"flashcards_{flashcard_file.name.split('.')[0]}.txt",
+                                    mime="text/plain"
+                                )
+                            else:
+                                st.warning("⚠️ No flashcards were generated. Please try with a different document.")
+                                
+                except Exception as e:
+                    st.error(f"❌ Error generating flashcards: {str(e)}")
+                    st.info("Please try uploading the document again or contact support if the issue persists.")
+        
+        else:
+            with flashcards_container:
+                st.markdown("<div class='summary-container'>", unsafe_allow_html=True)
+                st.info("👆 Upload a document to generate flashcards!")
+                st.markdown(
+                    "**Supported formats:** PDF, DOCX\n\n"
+                    "**Max file size:** 10MB\n\n"
+                    "**Features:** Term/Definition pairs, Multiple difficulty levels, Shuffle option"
+                )
+                st.markdown("</div>", unsafe_allow_html=True)
+
+@st.fragment
+def render_summarizer_tab():
+    """Document Summarizer tab; its widgets rerun only this fragment."""
+    st.markdown("<div class='tab-header'><h2>📄 Document Summarizer</h2><p>Upload your documents and get intelligent summaries</p></div>", unsafe_allow_html=True)
+    
+    # Create two columns for layout
+    col1, col2 = st.columns([1, 1.5])
+    
+    with col1:
+        st.markdown("### Upload & Options")
+        
+        # File upload section
+        with st.container():
+            st.markdown("<div class='upload-section'>", unsafe_allow_html=True)
+            uploaded_file = st.file_uploader(
+                "Choose a document",
+                type=['pdf', 'docx'],
+                help="Upload PDF or DOCX files (max 10MB)"
+            )
+            st.markdown("</div>", unsafe_allow_html=True)
+        
+        # Summary options
+        if uploaded_file:
+            st.markdown("### Summary Options")
+            
+            summary_length = st.selectbox(
+                "Summary Type",
+                ["Brief (3-5 key points)", "Detailed (7-10 key points)", "Comprehensive (10+ key points)"],
+                help="Choose the depth of summary you need"
+            )
+            
+            focus_area = st.selectbox(
+                "Focus Area (Optional)",
+                ["General Overview", "Main Arguments", "Key Concepts", "Important Facts", "Conclusions"],
+                help="What aspect should the summary emphasize?"
+            )
+            
+            # Generate summary button
+            generate_btn = st.button("🚀 Generate Summary", type="primary", use_container_width=True)
+    
+    with col2:
+        st.markdown("### Generated Summary")
+        
+        # Summary display container
+        summary_container = st.container()
+        
+        if uploaded_file:
+            # Display file info
+            file_details = {
+                "Filename": uploaded_file.name,
+                "File Type": uploaded_file.type,
+                "File Size": f"{uploaded_file.size / 1024:.2f} KB"
+            }
+            
+            with st.expander("📋 File Details"):
+                for key, value in file_details.items():
+                    st.write(f"**{key}:** {value}")
+            
+            # Process and display summary
+            if 'generate_btn' in locals() and generate_btn:
+                try:
+                    # Get shared summarizer agent
+                    summarizer = get_summarizer()
+                    
+                    summary_key = input_fingerprint(uploaded_file.getvalue(), summary_length, focus_area)
+                    
+                    # Stream the summary into the display container as it is generated
+                    with summary_container:
+                        st.markdown("<div class='summary-container'>", unsafe_allow_html=True)
+                        st.markdown("#### 📝 Summary")
+                        if st.session_state.get('summary_key') == summary_key and st.session_state.get('summary'):
+                            # Same document and options - reuse the last summary instead of calling Gemini again
+                            summary = st.session_state.summary
+                            st.markdown(summary)
+                        else:
+                            # Extract text once per unique file (cached on file bytes)
+                            with st.spinner("🔄 Processing document..."):
+                                document_text = extract_text(uploaded_file.getvalue(), uploaded_file.name)
+                            
+                            summary = st.write_stream(summarizer.stream_summarize(
+                                uploaded_file, 
+                                summary_length, 
+                                focus_area,
+                                text=document_text
+                            ))
+                            st.session_state.summary = summary
+                            st.session_state.summary_key = summary_key
+                        st.markdown("</div>", unsafe_allow_html=True)
+                        
+                        # Download button
+                        st.download_button(
+                            label="💾 Download Summary",
+                            data=summary,
+                            file_name=f"summary_{uploaded_file.name.split('.')[0]}.txt",
+                            mime="text/plain"
+                        )
+                        
+                except Exception as e:
+                    st.error(f"❌ Error processing document: {str(e)}")
+                    st.info("Please try uploading the document again or contact support if the issue persists.")
+        
+        else:
+            with summary_container:
+                st.markdown("<div class='summary-container'>", unsafe_allow_html=True)
+                st.info("👆 Upload a document to get started!")
+                st.markdown(
+                    "**Supported formats:** PDF, DOCX\n\n"
+                    "**Max file size:** 10MB"
+                )
+                st.markdown("</div>", unsafe_allow_html=True)
+
+@st.fragment
+def render_quiz_history():
+    """Quiz history toggle; showing it does not rerun the quiz tab."""
+    if st.checkbox("📊 Show Quiz History"):
+        try:
+            quiz_agent = get_quiz_agent()
+            history = quiz_agent.get_quiz_history()
+            
+            if history:
+                st.markdown("### 📈 Your Quiz Performance History")
+                st.markdown("\n\n".join(
+                    f"**{i}.** {record['topic']} - {record['score_percentage']:.1f}% ({record['grade']}) - {record['date']}"
+                    for i, record in enumerate(reversed(history[-10:]), 1)  # Show last 10 quizzes
+                ))
+            else:
+                st.info("No quiz history available yet. Take your first quiz!")
+        except Exception as e:
+            st.error(f"❌ Error loading quiz history: {str(e)}")
+
+@st.fragment
+def render_tracker_tab():
+    """Progress Tracker tab; its widgets rerun only this fragment."""
+    st.markdown("<div class='tab-header'><h2>🎯 Progress Tracker</h2><p>Monitor your learning journey and celebrate achievements</p></div>", unsafe_allow_html=True)
+    
+    try:
+        # Get shared tracker agent
+        tracker = get_tracker()
+        
+        # Display the tracker interface
+        tracker.display_tracker_interface()
+        
+    except Exception as e:
+        st.error(f"❌ Error loading progress tracker: {str(e)}")
+        st.info("Please try refreshing the page or contact support if the issue persists.")
 
 def main():
+    # Warm up Gemini in the background so the first request skips connection setup
+    warm_gemini()
+    
     # Main header
     st.markdown("<h1 class='main-header'>🎓 EduMate - AI Student Assistant</h1>", unsafe_allow_html=True)
     st.markdown("<p style='text-align: center; color: #64748b; font-size: 1.2rem; margin-bottom: 2rem;'>Your personalized AI companion for academic success</p>", unsafe_allow_html=True)
@@ -221,46 +615,48 @@ def main():
         with col1:
             st.markdown("### Learning Goals & Preferences")
             
-            # Topic/Goal input
-            learning_topic = st.text_input(
-                "📚 Learning Topic/Goal",
-                placeholder="e.g., Data Science, AI, Machine Learning, Web Development",
-                help="Enter what you want to learn"
-            )
-            
-            # Duration selection
-            study_duration = st.selectbox(
-                "⏱️ Study Plan Duration",
-                ["1 Week", "2 Weeks", "1 Month", "3 Months", "6 Months"],
-                index=2,
-                help="How long do you want your study plan to be?"
-            )
-            
-            # Daily time input
-            daily_study_time = st.selectbox(
-                "🕐 Daily Study Time Available",
-                ["30 minutes", "1 hour", "2 hours", "3 hours", "4+ hours"],
-                index=1,
-                help="How much time can you dedicate to studying each day?"
-            )
-            
-            # Current level
-            current_level = st.selectbox(
-                "🎯 Current Knowledge Level",
-                ["Beginner", "Intermediate", "Advanced"],
-                help="What's your current level in this topic?"
-            )
-            
-            # Learning style
-            learning_style = st.selectbox(
-                "📖 Preferred Learning Style",
-                ["Theory-focused", "Hands-on/Project-based", "Mixed approach"],
-                index=2,
-                help="How do you prefer to learn?"
-            )
-            
-            # Generate plan button
-            generate_plan_btn = st.button("🚀 Create Study Plan", type="primary", use_container_width=True)
+            # Inputs live in a form so editing them does not rerun the whole app
+            with st.form("planner_form"):
+                # Topic/Goal input
+                learning_topic = st.text_input(
+                    "📚 Learning Topic/Goal",
+                    placeholder="e.g., Data Science, AI, Machine Learning, Web Development",
+                    help="Enter what you want to learn"
+                )
+                
+                # Duration selection
+                study_duration = st.selectbox(
+                    "⏱️ Study Plan Duration",
+                    ["1 Week", "2 Weeks", "1 Month", "3 Months", "6 Months"],
+                    index=2,
+                    help="How long do you want your study plan to be?"
+                )
+                
+                # Daily time input
+                daily_study_time = st.selectbox(
+                    "🕐 Daily Study Time Available",
+                    ["30 minutes", "1 hour", "2 hours", "3 hours", "4+ hours"],
+                    index=1,
+                    help="How much time can you dedicate to studying each day?"
+                )
+                
+                # Current level
+                current_level = st.selectbox(
+                    "🎯 Current Knowledge Level",
+                    ["Beginner", "Intermediate", "Advanced"],
+                    help="What's your current level in this topic?"
+                )
+                
+                # Learning style
+                learning_style = st.selectbox(
+                    "📖 Preferred Learning Style",
+                    ["Theory-focused", "Hands-on/Project-based", "Mixed approach"],
+                    index=2,
+                    help="How do you prefer to learn?"
+                )
+                
+                # Generate plan button
+                generate_plan_btn = st.form_submit_button("🚀 Create Study Plan", type="primary", use_container_width=True)
         
         with col2:
             st.markdown("### Your Personalized Study Plan")
@@ -285,42 +681,46 @@ def main():
                 # Process and display study plan
                 if 'generate_plan_btn' in locals() and generate_plan_btn:
                     try:
-                        with st.spinner("🔄 Creating your personalized study plan..."):
-                            # Initialize planner agent
-                            planner = PlannerAgent()
-                            
-                            # Generate study plan
-                            study_plan = planner.create_study_plan(
-                                learning_topic,
-                                study_duration,
-                                daily_study_time,
-                                current_level,
-                                learning_style
-                            )
+                        # Get shared planner agent
+                        planner = get_planner()
+                        
+                        plan_key = input_fingerprint(learning_topic, study_duration, daily_study_time, current_level, learning_style)
+                        
+                        # Stream the study plan into the display container as it is generated
+                        with plan_container:
+                            st.markdown("<div class='summary-container'>", unsafe_allow_html=True)
+                            st.markdown("#### 📅 Your Study Plan")
+                            if st.session_state.get('plan_key') == plan_key and st.session_state.get('current_study_plan'):
+                                # Inputs unchanged since the last plan - reuse it instead of calling Gemini again
+                                study_plan = st.session_state.current_study_plan
+                                st.markdown(study_plan)
+                            else:
+                                study_plan = st.write_stream(planner.stream_study_plan(
+                                    learning_topic,
+                                    study_duration,
+                                    daily_study_time,
+                                    current_level,
+                                    learning_style
+                                ))
+                            st.markdown("</div>", unsafe_allow_html=True)
                             
                             # Store the study plan in session state for tracker
                             st.session_state.current_study_plan = study_plan
+                            st.session_state.plan_key = plan_key
                             st.session_state.plan_duration = study_duration
                             st.session_state.plan_topic = learning_topic
                             
-                            # Display study plan
-                            with plan_container:
-                                st.markdown("<div class='summary-container'>", unsafe_allow_html=True)
-                                st.markdown("#### 📅 Your Study Plan")
-                                st.markdown(study_plan)
-                                st.markdown("</div>", unsafe_allow_html=True)
-                                
-                                # Info about progress tracking
-                                st.info("🎯 Your study plan has been saved! You can now track your progress in the 'Progress Tracker' tab.")
-                                
-                                # Download button
-                                st.download_button(
-                                    label="💾 Download Study Plan",
-                                    data=study_plan,
-                                    file_name=f"study_plan_{learning_topic.replace(' ', '_')}.txt",
-                                    mime="text/plain"
-                                )
-                                
+                            # Info about progress tracking
+                            st.info("🎯 Your study plan has been saved! You can now track your progress in the 'Progress Tracker' tab.")
+                            
+                            # Download button
+                            st.download_button(
+                                label="💾 Download Study Plan",
+                                data=study_plan,
+                                file_name=f"study_plan_{learning_topic.replace(' ', '_')}.txt",
+                                mime="text/plain"
+                            )
+                            
                     except Exception as e:
                         st.error(f"❌ Error creating study plan: {str(e)}")
                         st.info("Please try again or contact support if the issue persists.")
@@ -329,235 +729,18 @@ def main():
                 with plan_container:
                     st.markdown("<div class='summary-container'>", unsafe_allow_html=True)
                     st.info("👆 Enter your learning topic to get started!")
-                    st.markdown("**Examples:** Data Science, Machine Learning, Python Programming")
-                    st.markdown("**Plan Features:** Daily breakdowns, Calendar view, Progress milestones")
-                    st.markdown("**Personalized:** Based on your time, level, and learning style")
+                    st.markdown(
+                        "**Examples:** Data Science, Machine Learning, Python Programming\n\n"
+                        "**Plan Features:** Daily breakdowns, Calendar view, Progress milestones\n\n"
+                        "**Personalized:** Based on your time, level, and learning style"
+                    )
                     st.markdown("</div>", unsafe_allow_html=True)
     
     with tab2:
-        st.markdown("<div class='tab-header'><h2>🃏 Flashcard Generator</h2><p>Transform your documents into study flashcards</p></div>", unsafe_allow_html=True)
-        
-        # Create two columns for layout
-        col1, col2 = st.columns([1, 1.5])
-        
-        with col1:
-            st.markdown("### Upload & Options")
-            
-            # File upload section
-            with st.container():
-                st.markdown("<div class='upload-section'>", unsafe_allow_html=True)
-                flashcard_file = st.file_uploader(
-                    "Choose a document for flashcards",
-                    type=['pdf', 'docx'],
-                    help="Upload PDF or DOCX files (max 10MB)",
-                    key="flashcard_uploader"
-                )
-                st.markdown("</div>", unsafe_allow_html=True)
-            
-            # Flashcard options
-            if flashcard_file:
-                st.markdown("### Flashcard Options")
-                
-                num_cards = st.number_input(
-                    "Number of Flashcards",
-                    min_value=1,
-                    max_value=50,
-                    value=10,
-                    help="How many flashcards do you want to generate?"
-                )
-                
-                difficulty = st.selectbox(
-                    "Difficulty Level",
-                    ["Basic", "Intermediate", "Advanced"],
-                    index=1,
-                    help="Choose the complexity level for your flashcards"
-                )
-                
-                st.markdown("### Study Options")
-                
-                shuffle_cards = st.checkbox(
-                    "🔀 Shuffle flashcards",
-                    help="Randomize the order of flashcards for better learning"
-                )
-                
-                # Generate flashcards button
-                generate_flashcards_btn = st.button("🃏 Generate Flashcards", type="primary", use_container_width=True)
-        
-        with col2:
-            st.markdown("### Generated Flashcards")
-            
-            # Flashcards display container
-            flashcards_container = st.container()
-            
-            if flashcard_file:
-                # Display file info
-                file_details = {
-                    "Filename": flashcard_file.name,
-                    "File Type": flashcard_file.type,
-                    "File Size": f"{flashcard_file.size / 1024:.2f} KB"
-                }
-                
-                with st.expander("📋 File Details"):
-                    for key, value in file_details.items():
-                        st.write(f"**{key}:** {value}")
-                
-                # Process and display flashcards
-                if 'generate_flashcards_btn' in locals() and generate_flashcards_btn:
-                    try:
-                        with st.spinner("🔄 Processing document and generating flashcards..."):
-                            # Initialize flashcard agent
-                            flashcard_agent = FlashcardAgent()
-                            
-                            # Generate flashcards
-                            flashcards = flashcard_agent.generate_flashcards(
-                                flashcard_file, 
-                                num_cards, 
-                                difficulty, 
-                                shuffle_cards
-                            )
-                            
-                            # Display flashcards
-                            with flashcards_container:
-                                if flashcards:
-                                    st.markdown("<div class='summary-container'>", unsafe_allow_html=True)
-                                    
-                                    # Display count and info
-                                    st.success(f"✅ Generated {len(flashcards)} flashcards successfully!")
-                                    
-                                    # Display flashcards
-                                    for i, card in enumerate(flashcards, 1):
-                                        with st.container():
-                                            st.markdown(f"### 🃏 Card {i}")
-                                            st.markdown(f"**Term:** {card['term']}")
-                                            st.markdown(f"**Definition:** {card['definition']}")
-                                            st.markdown("---")
-                                    
-                                    st.markdown("</div>", unsafe_allow_html=True)
-                                    
-                                    # Download button
-                                    print_format = flashcard_agent.format_flashcards_for_print(
-                                        flashcards, 
-                                        flashcard_file.name
-                                    )
-                                    
-                                    st.download_button(
-                                        label="🖨️ Download Print-Friendly Version",
-                                        data=print_format,
-                                        file_name=f"flashcards_{flashcard_file.name.split('.')[0]}.txt",
-                                        mime="text/plain"
-                                    )
-                                else:
-                                    st.warning("⚠️ No flashcards were generated. Please try with a different document.")
-                                    
-                    except Exception as e:
-                        st.error(f"❌ Error generating flashcards: {str(e)}")
-                        st.info("Please try uploading the document again or contact support if the issue persists.")
-            
-            else:
-                with flashcards_container:
-                    st.markdown("<div class='summary-container'>", unsafe_allow_html=True)
-                    st.info("👆 Upload a document to generate flashcards!")
-                    st.markdown("**Supported formats:** PDF, DOCX")
-                    st.markdown("**Max file size:** 10MB")
-                    st.markdown("**Features:** Term/Definition pairs, Multiple difficulty levels, Shuffle option")
-                    st.markdown("</div>", unsafe_allow_html=True)
+        render_flashcards_tab()
     
     with tab3:
-        st.markdown("<div class='tab-header'><h2>📄 Document Summarizer</h2><p>Upload your documents and get intelligent summaries</p></div>", unsafe_allow_html=True)
-        
-        # Create two columns for layout
-        col1, col2 = st.columns([1, 1.5])
-        
-        with col1:
-            st.markdown("### Upload & Options")
-            
-            # File upload section
-            with st.container():
-                st.markdown("<div class='upload-section'>", unsafe_allow_html=True)
-                uploaded_file = st.file_uploader(
-                    "Choose a document",
-                    type=['pdf', 'docx'],
-                    help="Upload PDF or DOCX files (max 10MB)"
-                )
-                st.markdown("</div>", unsafe_allow_html=True)
-            
-            # Summary options
-            if uploaded_file:
-                st.markdown("### Summary Options")
-                
-                summary_length = st.selectbox(
-                    "Summary Type",
-                    ["Brief (3-5 key points)", "Detailed (7-10 key points)", "Comprehensive (10+ key points)"],
-                    help="Choose the depth of summary you need"
-                )
-                
-                focus_area = st.selectbox(
-                    "Focus Area (Optional)",
-                    ["General Overview", "Main Arguments", "Key Concepts", "Important Facts", "Conclusions"],
-                    help="What aspect should the summary emphasize?"
-                )
-                
-                # Generate summary button
-                generate_btn = st.button("🚀 Generate Summary", type="primary", use_container_width=True)
-        
-        with col2:
-            st.markdown("### Generated Summary")
-            
-            # Summary display container
-            summary_container = st.container()
-            
-            if uploaded_file:
-                # Display file info
-                file_details = {
-                    "Filename": uploaded_file.name,
-                    "File Type": uploaded_file.type,
-                    "File Size": f"{uploaded_file.size / 1024:.2f} KB"
-                }
-                
-                with st.expander("📋 File Details"):
-                    for key, value in file_details.items():
-                        st.write(f"**{key}:** {value}")
-                
-                # Process and display summary
-                if 'generate_btn' in locals() and generate_btn:
-                    try:
-                        with st.spinner("🔄 Processing document and generating summary..."):
-                            # Initialize summarizer agent
-                            summarizer = SummarizerAgent()
-                            
-                            # Generate summary
-                            summary = summarizer.summarize_document(
-                                uploaded_file, 
-                                summary_length, 
-                                focus_area
-                            )
-                            
-                            # Display summary
-                            with summary_container:
-                                st.markdown("<div class='summary-container'>", unsafe_allow_html=True)
-                                st.markdown("#### 📝 Summary")
-                                st.markdown(summary)
-                                st.markdown("</div>", unsafe_allow_html=True)
-                                
-                                # Download button
-                                st.download_button(
-                                    label="💾 Download Summary",
-                                    data=summary,
-                                    file_name=f"summary_{uploaded_file.name.split('.')[0]}.txt",
-                                    mime="text/plain"
-                                )
-                                
-                    except Exception as e:
-                        st.error(f"❌ Error processing document: {str(e)}")
-                        st.info("Please try uploading the document again or contact support if the issue persists.")
-            
-            else:
-                with summary_container:
-                    st.markdown("<div class='summary-container'>", unsafe_allow_html=True)
-                    st.info("👆 Upload a document to get started!")
-                    st.markdown("**Supported formats:** PDF, DOCX")
-                    st.markdown("**Max file size:** 10MB")
-                    st.markdown("</div>", unsafe_allow_html=True)
+        render_summarizer_tab()
     
     with tab4:
         st.markdown("<div class='tab-header'><h2>❓ Quiz Generator</h2><p>Test your knowledge with AI-generated quizzes</p></div>", unsafe_allow_html=True)
@@ -627,23 +810,29 @@ def main():
                         st.write(f"**{key}:** {value}")
                 
                 # Process and display quiz
-                if 'generate_quiz_btn' in locals() and generate_quiz_btn:
+                quiz_key = input_fingerprint(quiz_topic, num_questions, quiz_difficulty, tuple(question_types))
+                
+                # Skip regeneration when the settings match the quiz already on screen
+                if ('generate_quiz_btn' in locals() and generate_quiz_btn
+                        and not (st.session_state.get('quiz_key') == quiz_key and st.session_state.get('current_quiz'))):
                     try:
                         with st.spinner("🔄 Generating quiz questions..."):
-                            # Initialize quiz agent
-                            quiz_agent = QuizAgent()
+                            # Get shared quiz agent
+                            quiz_agent = get_quiz_agent()
                             
                             # Generate quiz questions
-                            questions = quiz_agent.create_quiz(
+                            quiz = run_in_background(asyncio.run, quiz_agent.acreate_quiz(
                                 quiz_topic,
                                 num_questions,
                                 quiz_difficulty,
                                 question_types
-                            )
+                            ))
                             
-                            # Store questions in session state
-                            st.session_state.current_quiz = questions
+                            # Store questions and precomputed answer key in session state
+                            st.session_state.current_quiz = quiz['questions']
+                            st.session_state.answer_key = quiz['answer_key']
                             st.session_state.quiz_topic = quiz_topic
+                            st.session_state.quiz_key = quiz_key
                     except Exception as e:
                         st.error(f"❌ Error generating quiz: {str(e)}")
                         st.info("Please try again or contact support if the issue persists.")
@@ -659,12 +848,11 @@ def main():
                         user_answers = {}
                         
                         for i, question in enumerate(st.session_state.current_quiz, 1):
-                            st.markdown(f"<div class='quiz-question'>", unsafe_allow_html=True)
-                            st.markdown(f"**Question {i}:** {question['question']}")
+                            st.markdown(f"<div class='quiz-question'></div>\n\n**Question {i}:** {question['question']}", unsafe_allow_html=True)
                             
                             if question['type'] == 'Multiple Choice' and question['options']:
                                 # Extract options for radio buttons
-                                options = [opt.split(')', 1)[1].strip() if ')' in opt else opt for opt in question['options']]
+                                options = question['clean_options']
                                 option_labels = ['A', 'B', 'C', 'D'][:len(options)]
                                 
                                 selected_option = st.radio(
@@ -688,17 +876,19 @@ def main():
                                 )
                                 if selected_answer:
                                     user_answers[f"q_{i}"] = selected_answer
-                            
-                            st.markdown("</div>", unsafe_allow_html=True)
                         
                         # Submit quiz button
                         submit_quiz = st.form_submit_button("📊 Submit Quiz", type="primary")
                         
                         if submit_quiz:
                             try:
-                                # Calculate score
-                                quiz_agent = QuizAgent()
-                                score_data = quiz_agent.calculate_score(st.session_state.current_quiz, user_answers)
+                                # Calculate score against the answer key built at generation time
+                                quiz_agent = get_quiz_agent()
+                                score_data = quiz_agent.calculate_score(
+                                    st.session_state.current_quiz,
+                                    user_answers,
+                                    st.session_state.get('answer_key')
+                                )
                                 
                                 # Save performance
                                 quiz_agent.save_quiz_performance(st.session_state.quiz_topic, score_data)
@@ -712,19 +902,20 @@ def main():
                                 
                                 # Show detailed results
                                 with st.expander("📋 Detailed Results & Explanations"):
-                                    for result in score_data['detailed_results']:
-                                        status = "✅ Correct" if result['is_correct'] else "❌ Incorrect"
-                                        st.markdown(f"**Q{result['question_num']}:** {result['question']}")
-                                        st.markdown(f"{status} - Your answer: {result['user_answer']}")
-                                        st.markdown(f"**Correct answer:** {result['correct_answer']}")
-                                        st.markdown(f"**Explanation:** {result['explanation']}")
-                                        st.markdown("---")
+                                    # Render every result as a single markdown element
+                                    st.markdown("\n\n".join(
+                                        f"**Q{result['question_num']}:** {result['question']}\n\n"
+                                        f"{'✅ Correct' if result['is_correct'] else '❌ Incorrect'} - Your answer: {result['user_answer']}\n\n"
+                                        f"**Correct answer:** {result['correct_answer']}\n\n"
+                                        f"**Explanation:** {result['explanation']}\n\n"
+                                        "---"
+                                        for result in score_data['detailed_results']
+                                    ))
                                 
-                                # Download results
-                                results_text = quiz_agent.format_quiz_results(st.session_state.quiz_topic, score_data)
+                                # Download results - the text is only built when clicked
                                 st.download_button(
                                     label="💾 Download Results",
-                                    data=results_text,
+                                    data=partial(quiz_agent.format_quiz_results, st.session_state.quiz_topic, score_data),
                                     file_name=f"quiz_results_{st.session_state.quiz_topic.replace(' ', '_')}.txt",
                                     mime="text/plain"
                                 )
@@ -738,51 +929,31 @@ def main():
                 with quiz_container:
                     st.markdown("<div class='summary-container'>", unsafe_allow_html=True)
                     st.info("👆 Configure your quiz settings and click 'Generate Quiz' to start!")
-                    st.markdown("**Features:** Multiple choice & True/False questions")
-                    st.markdown("**Instant feedback:** Get explanations for all answers")
-                    st.markdown("**Performance tracking:** View your quiz history")
+                    st.markdown(
+                        "**Features:** Multiple choice & True/False questions\n\n"
+                        "**Instant feedback:** Get explanations for all answers\n\n"
+                        "**Performance tracking:** View your quiz history"
+                    )
                     st.markdown("</div>", unsafe_allow_html=True)
             
             else:
                 with quiz_container:
                     st.markdown("<div class='summary-container'>", unsafe_allow_html=True)
                     st.info("👆 Enter a quiz topic to get started!")
-                    st.markdown("**Examples:** Python basics, Machine Learning concepts, Data Analysis")
-                    st.markdown("**Question types:** Multiple choice, True/False")
-                    st.markdown("**Difficulty levels:** Easy, Intermediate, Hard")
+                    st.markdown(
+                        "**Examples:** Python basics, Machine Learning concepts, Data Analysis\n\n"
+                        "**Question types:** Multiple choice, True/False\n\n"
+                        "**Difficulty levels:** Easy, Intermediate, Hard"
+                    )
                     st.markdown("</div>", unsafe_allow_html=True)
         
         # Quiz history section
-        if st.checkbox("📊 Show Quiz History"):
-            try:
-                quiz_agent = QuizAgent()
-                history = quiz_agent.get_quiz_history()
-                
-                if history:
-                    st.markdown("### 📈 Your Quiz Performance History")
-                    for i, record in enumerate(reversed(history[-10:]), 1):  # Show last 10 quizzes
-                        st.markdown(f"**{i}.** {record['topic']} - {record['score_percentage']:.1f}% ({record['grade']}) - {record['date']}")
-                else:
-                    st.info("No quiz history available yet. Take your first quiz!")
-            except Exception as e:
-                st.error(f"❌ Error loading quiz history: {str(e)}")
+        render_quiz_history()
     
     # NEW: Progress Tracker Tab
     with tab5:
-        st.markdown("<div class='tab-header'><h2>🎯 Progress Tracker</h2><p>Monitor your learning journey and celebrate achievements</p></div>", unsafe_allow_html=True)
-        
-        try:
-            # Initialize tracker agent
-            tracker = TrackerAgent()
-            
-            # Display the tracker interface
-            tracker.display_tracker_interface()
-            
-        except Exception as e:
-            st.error(f"❌ Error loading progress tracker: {str(e)}")
-            st.info("Please try refreshing the page or contact support if the issue persists.")
-    
-    
+        render_tracker_tab()
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -6,7 +6,16 @@ This package contains various AI agents for the EduMate application:
 - Future agents will be added here
 """
 
-from .summarizer_agent import SummarizerAgent
-from .flashcard_agent import FlashcardAgent
+__all__ = ['SummarizerAgent', 'FlashcardAgent']
 
-__all__ = ['SummarizerAgent', 'FlashcardAgent']
\ No newline at end of file
+# Agents are imported lazily so importing one agent module does not load the others
+_LAZY_AGENTS = {
+    'SummarizerAgent': '.summarizer_agent',
+    'FlashcardAgent': '.flashcard_agent',
+}
+
+def __getattr__(name):
+    if name in _LAZY_AGENTS:
+        from importlib import import_module
+        return getattr(import_module(_LAZY_AGENTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
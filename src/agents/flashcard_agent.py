@@ -1,7 +1,6 @@
 # flashcard_agent.py
 
-import os
-import tempfile
+import io
 import streamlit as st
 from typing import Optional, List, Dict
 import google.generativeai as genai
@@ -9,48 +8,87 @@ from PyPDF2 import PdfReader
 from docx import Document
 import json
 import random
+import math
+import asyncio
+import hashlib
+import datetime
+import re
+from .llm_cache import cached_llm_call
+from .gemini_model import get_model
+
+# Cards requested per concurrent Gemini call when generating asynchronously
+CARDS_PER_REQUEST = 5
+
+# One TERM/DEFINITION pair, with the definition running until the next FLASHCARD_ marker
+FLASHCARD_PATTERN = re.compile(
+    r'TERM:[ \t]*(?P<term>[^\n]+?)\s*DEFINITION:\s*(?P<definition>.+?)(?=\s*FLASHCARD_\d+:|\Z)',
+    re.DOTALL
+)
+
+# Longest document text sent inline with a prompt, and how many evenly spaced excerpts to keep when trimming
+MAX_DOCUMENT_CHARS = 30000
+DOCUMENT_EXCERPTS = 6
+
+DIFFICULTY_INSTRUCTIONS = {
+    "Basic": "Focus on simple, fundamental concepts and basic definitions. Use clear, straightforward language.",
+    "Intermediate": "Include more detailed concepts and relationships. Use moderate academic vocabulary.",
+    "Advanced": "Focus on complex ideas, nuanced concepts, and advanced terminology. Use sophisticated academic language."
+}
+
+# Explicit context caching: documents below ~32k tokens are not eligible, and caches live for 10 minutes
+CONTEXT_CACHE_MIN_WORDS = 25000
+CONTEXT_CACHE_TTL = datetime.timedelta(minutes=10)
+
+# Static flashcard rubric, sent ahead of the document so the prompt prefix is identical across calls
+FLASHCARD_INSTRUCTIONS = """
+        You are an expert educational content creator specializing in creating effective flashcards for students.
+        
+        **Flashcard Requirements:**
+        - Format: Term/Definition pairs
+        - Each flashcard should test important concepts from the document
+        - Terms should be key concepts, important vocabulary, or significant ideas
+        - Definitions should be clear, concise, and educational (2-4 sentences)
+        - Avoid overly simple or overly complex terms based on difficulty level
+        - Ensure flashcards cover different sections/topics from the document
+        - Make definitions standalone (don't reference "the document" or "as mentioned")
+        
+        **Output Format (STRICTLY FOLLOW THIS FORMAT):**
+        FLASHCARD_1:
+        TERM: [Key term or concept]
+        DEFINITION: [Clear, educational definition]
+        
+        FLASHCARD_2:
+        TERM: [Key term or concept]
+        DEFINITION: [Clear, educational definition]
+        
+        [Continue for all requested flashcards...]
+        """
+
+# Per-call part of the prompt: card count and difficulty
+FLASHCARD_REQUEST_TEMPLATE = """
+        Please analyze the document and create {num_cards} high-quality flashcards using Term/Definition format.
+        
+        - Difficulty Level: {difficulty} - {difficulty_instruction}
+        
+        Please generate exactly {num_cards} flashcards now:
+        """
+
+FLASHCARD_PROMPT_TEMPLATE = """{instructions}
+        **Document Content:**
+        {text}
+        {request}"""
 
 class FlashcardAgent:
     def __init__(self):
         """Initialize the Flashcard Agent with Gemini API."""
-        self.api_key = os.getenv("GOOGLE_API_KEY")
-        if not self.api_key:
-            raise ValueError("GOOGLE_API_KEY not found in environment variables")
-        
-        # Configure Gemini API
-        genai.configure(api_key=self.api_key)
-        
-        # Try to initialize with the best available model
-        try:
-            self.model = genai.GenerativeModel('gemini-1.5-flash')
-        except Exception:
-            try:
-                # Fallback to other available models
-                self.model = genai.GenerativeModel('gemini-1.5-pro')
-            except Exception:
-                try:
-                    self.model = genai.GenerativeModel('gemini-pro')
-                except Exception:
-                    # Get list of available models and use the first generative one
-                    available_models = genai.list_models()
-                    generative_models = [
-                        model for model in available_models 
-                        if 'generateContent' in model.supported_generation_methods
-                    ]
-                    if generative_models:
-                        model_name = generative_models[0].name.replace('models/', '')
-                        self.model = genai.GenerativeModel(model_name)
-                    else:
-                        raise ValueError("No suitable generative models available")
+        # Shared Gemini model, configured once per process
+        self.model = get_model()
     
     def extract_text_from_pdf(self, file) -> str:
         """Extract text from PDF file."""
         try:
             pdf_reader = PdfReader(file)
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-            return text.strip()
+            return "\n".join(page.extract_text() or "" for page in pdf_reader.pages).strip()
         except Exception as e:
             raise Exception(f"Error reading PDF: {str(e)}")
     
@@ -58,10 +96,7 @@ class FlashcardAgent:
         """Extract text from DOCX file."""
         try:
             doc = Document(file)
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            return text.strip()
+            return "\n".join(paragraph.text for paragraph in doc.paragraphs).strip()
         except Exception as e:
             raise Exception(f"Error reading DOCX: {str(e)}")
     
@@ -73,84 +108,131 @@ class FlashcardAgent:
         if uploaded_file.size > 10 * 1024 * 1024:
             raise Exception("File size exceeds 10MB limit")
         
-        # Create a temporary file
-        with tempfile.NamedTemporaryFile(delete=False) as tmp_file:
-            tmp_file.write(uploaded_file.read())
-            tmp_file_path = tmp_file.name
+        # Read the upload into memory; PdfReader and python-docx both accept file-like objects
+        buffer = io.BytesIO(uploaded_file.read())
         
-        try:
-            if file_type == "application/pdf":
-                with open(tmp_file_path, 'rb') as file:
-                    text = self.extract_text_from_pdf(file)
-            elif file_type == "application/vnd.openxmlformats-officedudlament.wordprocessingml.document":
-                text = self.extract_text_from_docx(tmp_file_path)
-            else:
-                raise Exception(f"Unsupported file type: {file_type}")
-            
-            if not text.strip():
-                raise Exception("No text content found in the document")
-            
+        if file_type == "application/pdf":
+            text = self.extract_text_from_pdf(buffer)
+        elif file_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
+            text = self.extract_text_from_docx(buffer)
+        else:
+            raise Exception(f"Unsupported file type: {file_type}")
+        
+        if not text.strip():
+            raise Exception("No text content found in the document")
+        
+        return text
+    
+    def create_flashcard_request(self, num_cards: int, difficulty: str) -> str:
+        """Create the per-call part of the flashcard prompt (card count and difficulty)."""
+        difficulty_instruction = DIFFICULTY_INSTRUCTIONS.get(difficulty, DIFFICULTY_INSTRUCTIONS["Intermediate"])
+        return FLASHCARD_REQUEST_TEMPLATE.format(
+            num_cards=num_cards,
+            difficulty=difficulty,
+            difficulty_instruction=difficulty_instruction
+        )
+    
+    def trim_text(self, text: str, max_chars: int = MAX_DOCUMENT_CHARS) -> str:
+        """Keep evenly spaced excerpts of an over-long document so it fits in max_chars."""
+        if len(text) <= max_chars:
             return text
         
-        finally:
-            # Clean up temporary file
-            if os.path.exists(tmp_file_path):
-                os.unlink(tmp_file_path)
+        # Excerpts run from the start to the end of the document so every section is represented
+        window = max_chars // DOCUMENT_EXCERPTS
+        stride = (len(text) - window) / (DOCUMENT_EXCERPTS - 1)
+        starts = [round(i * stride) for i in range(DOCUMENT_EXCERPTS)]
+        return "\n...\n".join(text[start:start + window] for start in starts)
     
     def create_flashcard_prompt(self, text: str, num_cards: int, difficulty: str) -> str:
         """Create a detailed prompt for Gemini to generate flashcards."""
+        return FLASHCARD_PROMPT_TEMPLATE.format(
+            instructions=FLASHCARD_INSTRUCTIONS,
+            text=self.trim_text(text),
+            request=self.create_flashcard_request(num_cards, difficulty)
+        )
+    
+    def get_cached_model(self, text: str) -> Optional[genai.GenerativeModel]:
+        """Return a model bound to an explicit Gemini context cache of the document, or None if it can't be cached."""
+        if len(text.split()) < CONTEXT_CACHE_MIN_WORDS:
+            return None
         
-        difficulty_instructions = {
-            "Basic": "Focus on simple, fundamental concepts and basic definitions. Use clear, straightforward language.",
-            "Intermediate": "Include more detailed concepts and relationships. Use moderate academic vocabulary.",
-            "Advanced": "Focus on complex ideas, nuanced concepts, and advanced terminology. Use sophisticated academic language."
-        }
-        
-        difficulty_instruction = difficulty_instructions.get(difficulty, difficulty_instructions["Intermediate"])
-        
-        prompt = f"""
-        You are an expert educational content creator specializing in creating effective flashcards for students.
-        
-        Please analyze the following document and create {num_cards} high-quality flashcards using Term/Definition format.
-        
-        **Flashcard Requirements:**
-        - Difficulty Level: {difficulty} - {difficulty_instruction}
-        - Format: Term/Definition pairs
-        - Each flashcard should test important concepts from the document
-        - Terms should be key concepts, important vocabulary, or significant ideas
-        - Definitions should be clear, concise, and educational (2-4 sentences)
-        - Avoid overly simple or overly complex terms based on difficulty level
-        - Ensure flashcards cover different sections/topics from the document
-        - Make definitions standalone (don't reference "the document" or "as mentioned")
-        
-        **Output Format (STRICTLY FOLLOW THIS FORMAT):**
-        FLASHCARD_1:
-        TERM: [Key term or concept]
-        DEFINITION: [Clear, educational definition]
-        
-        FLASHCARD_2:
-        TERM: [Key term or concept]
-        DEFINITION: [Clear, educational definition]
+        caches = st.session_state.setdefault('flashcard_cache', {})
+        key = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        if key in caches:
+            cache = caches[key]
+            if cache is None:
+                return None
+            if cache.expire_time > datetime.datetime.now(datetime.timezone.utc):
+                return genai.GenerativeModel.from_cached_content(cached_content=cache)
         
-        [Continue for all {num_cards} flashcards...]
+        try:
+            cache = genai.caching.CachedContent.create(
+                model=self.model.model_name,
+                system_instruction=FLASHCARD_INSTRUCTIONS,
+                contents=[f"**Document Content:**\n{text}"],
+                ttl=CONTEXT_CACHE_TTL,
+            )
+        except Exception:
+            # Model doesn't support explicit caching; remember that and send the document inline
+            caches[key] = None
+            return None
         
-        **Document Content:**
-        {text}
+        caches[key] = cache
+        return genai.GenerativeModel.from_cached_content(cached_content=cache)
+    
+    def generate_flashcards_with_gemini(self, prompt: str, model: Optional[genai.GenerativeModel] = None) -> str:
+        """Generate flashcards using Gemini API."""
+        try:
+            model = model or self.model
+            return cached_llm_call(model, model.cached_content or model.model_name, prompt)
         
-        Please generate exactly {num_cards} flashcards now:
-        """
+        except Exception as e:
+            if "API_KEY" in str(e):
+                raise Exception("Invalid API key. Please check your Gemini API key.")
+            elif "quota" in str(e).lower():
+                raise Exception("API quota exceeded. Please try again later.")
+            else:
+                raise Exception(f"Error generating flashcards: {str(e)}")
+    
+    async def agenerate_flashcards_with_gemini(self, prompt: str, semaphore: asyncio.Semaphore, model: Optional[genai.GenerativeModel] = None) -> str:
+        """Generate flashcards asynchronously using Gemini API."""
+        try:
+            model = model or self.model
+            async with semaphore:
+                return await asyncio.to_thread(cached_llm_call, model, model.cached_content or model.model_name, prompt)
         
-        return prompt
+        except Exception as e:
+            if "API_KEY" in str(e):
+                raise Exception("Invalid API key. Please check your Gemini API key.")
+            elif "quota" in str(e).lower():
+                raise Exception("API quota exceeded. Please try again later.")
+            else:
+                raise Exception(f"Error generating flashcards: {str(e)}")
     
-    def generate_flashcards_with_gemini(self, prompt: str) -> str:
-        """Generate flashcards using Gemini API."""
+    async def astream_flashcards_with_gemini(self, prompt: str, semaphore: asyncio.Semaphore, model: Optional[genai.GenerativeModel] = None, on_card=None) -> str:
+        """Stream a flashcard batch from Gemini, handing each card to on_card as soon as its block is complete."""
         try:
-            response = self.model.generate_content(prompt)
+            model = model or self.model
+            chunks = []
+            pending = ""
+            async with semaphore:
+                async for chunk in await model.generate_content_async(prompt, stream=True):
+                    if not chunk.text:
+                        continue
+                    chunks.append(chunk.text)
+                    
+                    # Every block before the latest FLASHCARD_ marker is complete
+                    *complete, pending = (pending + chunk.text).split("FLASHCARD_")
+                    for block in complete:
+                        card = self.parse_flashcard_block(block)
+                        if card:
+                            on_card(card)
             
-            if not response.text:
-                raise Exception("Empty response from Gemini API")
+            card = self.parse_flashcard_block(pending)
+            if card:
+                on_card(card)
             
-            return response.text.strip()
+            return "".join(chunks)
         
         except Exception as e:
             if "API_KEY" in str(e):
@@ -160,64 +242,53 @@ class FlashcardAgent:
             else:
                 raise Exception(f"Error generating flashcards: {str(e)}")
     
+    def parse_flashcard_block(self, block: str) -> Optional[Dict[str, str]]:
+        """Parse a single FLASHCARD_ block into a term/definition pair, or None if it is incomplete."""
+        match = FLASHCARD_PATTERN.search(block)
+        return self.match_to_flashcard(match) if match else None
+    
+    def match_to_flashcard(self, match: re.Match) -> Dict[str, str]:
+        """Build a flashcard from a FLASHCARD_PATTERN match, joining multi-line definitions."""
+        return {
+            "term": match.group("term").strip(),
+            "definition": " ".join(match.group("definition").split())
+        }
+    
     def parse_flashcards(self, response_text: str) -> List[Dict[str, str]]:
         """Parse the Gemini response into structured flashcard data."""
-        flashcards = []
-        
         try:
-            # Split response into individual flashcards
-            flashcard_blocks = response_text.split("FLASHCARD_")
-            
-            for block in flashcard_blocks[1:]:  # Skip the first empty split
-                lines = block.strip().split("\n")
-                term = ""
-                definition = ""
-                
-                for line in lines:
-                    line = line.strip()
-                    if line.startswith("TERM:"):
-                        term = line.replace("TERM:", "").strip()
-                    elif line.startswith("DEFINITION:"):
-                        definition = line.replace("DEFINITION:", "").strip()
-                    elif definition and not line.startswith("FLASHCARD_"):
-                        # Continue definition on next line
-                        definition += " " + line
-                
-                if term and definition:
-                    flashcards.append({
-                        "term": term,
-                        "definition": definition
-                    })
-            
-            return flashcards
+            return [self.match_to_flashcard(match) for match in FLASHCARD_PATTERN.finditer(response_text)]
         
         except Exception as e:
             raise Exception(f"Error parsing flashcards: {str(e)}")
     
     def shuffle_flashcards(self, flashcards: List[Dict[str, str]]) -> List[Dict[str, str]]:
         """Shuffle the order of flashcards."""
-        shuffled = flashcards.copy()
-        random.shuffle(shuffled)
-        return shuffled
+        return random.sample(flashcards, len(flashcards))
     
-    def generate_flashcards(self, uploaded_file, num_cards: int, difficulty: str, shuffle: bool = False) -> List[Dict[str, str]]:
+    def generate_flashcards(self, uploaded_file, num_cards: int, difficulty: str, shuffle: bool = False, text: Optional[str] = None) -> List[Dict[str, str]]:
         """Main method to generate flashcards from uploaded document."""
         try:
-            # Step 1: Extract text from document
-            st.info("📄 Extracting text from document...")
-            text = self.extract_text_from_file(uploaded_file)
+            # Step 1: Extract text from document (unless already extracted)
+            if text is None:
+                st.info("📄 Extracting text from document...")
+                text = self.extract_text_from_file(uploaded_file)
             
             # Check if text is sufficient for flashcard generation
             if len(text.split()) < 100:
                 raise Exception("Document too short to generate meaningful flashcards (minimum 100 words required)")
             
-            # Step 2: Create flashcard prompt
+            # Step 2: Create flashcard prompt, referencing a context cache for large documents
             st.info("🤖 Preparing flashcard generation request...")
-            prompt = self.create_flashcard_prompt(text, num_cards, difficulty)
+            cached_model = self.get_cached_model(text)
+            if cached_model:
+                prompt = self.create_flashcard_request(num_cards, difficulty)
+            else:
+                prompt = self.create_flashcard_prompt(text, num_cards, difficulty)
             
             # Step 3: Generate flashcards using Gemini
             st.info("✨ Generating intelligent flashcards...")
-            response = self.generate_flashcards_with_gemini(prompt)
+            response = self.generate_flashcards_with_gemini(prompt, cached_model)
             
             # Step 4: Parse flashcards
             st.info("📝 Processing flashcards...")
@@ -235,12 +306,77 @@ class FlashcardAgent:
         except Exception as e:
             raise Exception(f"Flashcard generation failed: {str(e)}")
     
+    async def agenerate_flashcards(self, text: str, num_cards: int, difficulty: str, shuffle: bool = False, max_concurrency: int = 6, on_card=None) -> List[Dict[str, str]]:
+        """Generate flashcards in concurrent batches, each drawn from a distinct chunk of the document.
+        
+        If on_card is given, batches are streamed and each card is passed to it as soon as it is parsed.
+        """
+        try:
+            # Check if text is sufficient for flashcard generation
+            words = text.split()
+            if len(words) < 100:
+                raise Exception("Document too short to generate meaningful flashcards (minimum 100 words required)")
+            
+            # Step 1: Split the document into one chunk per batch of cards
+            st.info("🤖 Preparing flashcard generation request...")
+            num_batches = math.ceil(num_cards / CARDS_PER_REQUEST)
+            chunk_size = math.ceil(len(words) / num_batches)
+            requests = []
+            for batch in range(num_batches):
+                batch_cards = min(CARDS_PER_REQUEST, num_cards - batch * CARDS_PER_REQUEST)
+                chunk = " ".join(words[batch * chunk_size:(batch + 1) * chunk_size])
+                cached_model = self.get_cached_model(chunk)
+                if cached_model:
+                    requests.append((self.create_flashcard_request(batch_cards, difficulty), cached_model))
+                else:
+                    requests.append((self.create_flashcard_prompt(chunk, batch_cards, difficulty), None))
+            
+            # Step 2: Generate all batches concurrently
+            st.info("✨ Generating intelligent flashcards...")
+            semaphore = asyncio.Semaphore(max_concurrency)
+            if on_card:
+                responses = await asyncio.gather(*(self.astream_flashcards_with_gemini(prompt, semaphore, model, on_card) for prompt, model in requests))
+            else:
+                responses = await asyncio.gather(*(self.agenerate_flashcards_with_gemini(prompt, semaphore, model) for prompt, model in requests))
+            
+            # Step 3: Parse and combine the batches
+            st.info("📝 Processing flashcards...")
+            flashcards = [card for response in responses for card in self.parse_flashcards(response)][:num_cards]
+            
+            if not flashcards:
+                raise Exception("No valid flashcards could be generated from the document")
+            
+            # Step 4: Shuffle if requested
+            if shuffle:
+                flashcards = self.shuffle_flashcards(flashcards)
+            
+            return flashcards
+        
+        except Exception as e:
+            raise Exception(f"Flashcard generation failed: {str(e)}")
+    
+    async def agenerate_flashcards_multi(self, text: str, num_cards: int, difficulties: List[str], max_concurrency: int = 6) -> Dict[str, List[Dict[str, str]]]:
+        """Generate a flashcard set for each difficulty level concurrently."""
+        decks = await asyncio.gather(*(
+            self.agenerate_flashcards(text, num_cards, difficulty, max_concurrency=max_concurrency)
+            for difficulty in difficulties
+        ))
+        return dict(zip(difficulties, decks))
+    
+    def generate_flashcards_multi(self, uploaded_file, num_cards: int, difficulties: List[str], text: Optional[str] = None) -> Dict[str, List[Dict[str, str]]]:
+        """Generate flashcard sets for several difficulty levels from one document in a single round of API calls."""
+        if text is None:
+            st.info("📄 Extracting text from document...")
+            text = self.extract_text_from_file(uploaded_file)
+        
+        return asyncio.run(self.agenerate_flashcards_multi(text, num_cards, difficulties))
+    
     def format_flashcards_for_display(self, flashcards: List[Dict[str, str]], filename: str) -> str:
         """Format flashcards for display in the UI."""
         if not flashcards:
             return "No flashcards generated."
         
-        formatted = f"""
+        formatted = [f"""
 ### 🃏 Generated Flashcards
 
 **Source:** {filename}  
@@ -248,26 +384,25 @@ class FlashcardAgent:
 **Generated:** Now
 
 ---
-"""
+"""]
         
-        for i, card in enumerate(flashcards, 1):
-            formatted += f"""
+        formatted.extend(f"""
 **Card {i}:**
 - **Term:** {card['term']}
 - **Definition:** {card['definition']}
 
 ---
-"""
+""" for i, card in enumerate(flashcards, 1))
         
-        formatted += "\n*Generated by EduMate AI Assistant*"
-        return formatted.strip()
+        formatted.append("\n*Generated by EduMate AI Assistant*")
+        return "".join(formatted).strip()
     
     def format_flashcards_for_print(self, flashcards: List[Dict[str, str]], filename: str) -> str:
         """Format flashcards for print-friendly download."""
         if not flashcards:
             return "No flashcards to export."
         
-        print_format = f"""
+        print_format = [f"""
 EDUMATE FLASHCARDS
 ==================
 
@@ -275,10 +410,9 @@ Source Document: {filename}
 Total Cards: {len(flashcards)}
 Generated: {st.session_state.get('current_time', 'Now')}
 
-"""
+"""]
         
-        for i, card in enumerate(flashcards, 1):
-            print_format += f"""
+        print_format.extend(f"""
 CARD {i}
 --------
 TERM: {card['term']}
@@ -286,12 +420,12 @@ TERM: {card['term']}
 DEFINITION: {card['definition']}
 
 
-"""
+""" for i, card in enumerate(flashcards, 1))
         
-        print_format += """
+        print_format.append("""
 ===========================================
 Generated by EduMate AI Assistant
 Study tip: Cover the definitions and test your knowledge!
-"""
+""")
         
-        return print_format.strip()
\ No newline at end of file
+        return "".join(print_format).strip()
\ No newline at end of file
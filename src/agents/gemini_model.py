@@ -0,0 +1,31 @@
+# gemini_model.py
+import os
+import streamlit as st
+import google.generativeai as genai
+
+@st.cache_resource(show_spinner=False)
+def get_model() -> genai.GenerativeModel:
+    """Configure Gemini and pick the best available model once, shared by every agent."""
+    api_key = os.getenv("GOOGLE_API_KEY")
+    if not api_key:
+        raise ValueError("GOOGLE_API_KEY not found in environment variables")
+    
+    # Configure Gemini API
+    genai.configure(api_key=api_key)
+    
+    # Try to initialize with the best available model
+    for model_name in ('gemini-1.5-flash', 'gemini-1.5-pro', 'gemini-pro'):
+        try:
+            return genai.GenerativeModel(model_name)
+        except Exception:
+            continue
+    
+    # Get list of available models and use the first generative one
+    generative_models = [
+        model for model in genai.list_models()
+        if 'generateContent' in model.supported_generation_methods
+    ]
+    if not generative_models:
+        raise ValueError("No suitable generative models available")
+    
+    return genai.GenerativeModel(generative_models[0].name.replace('models/', ''))
@@ -0,0 +1,16 @@
+# llm_cache.py
+import streamlit as st
+
+@st.cache_data(ttl=3600, max_entries=500, show_spinner=False)
+def cached_llm_call(_model, model_name: str, prompt: str) -> str:
+    """Call Gemini and cache the response text for identical (model, prompt) pairs.
+
+    The model object itself is not hashable, so it is excluded from the cache key
+    (leading underscore) and identified by ``model_name`` instead.
+    """
+    response = _model.generate_content(prompt)
+
+    if not response.text:
+        raise Exception("Empty response from Gemini API")
+
+    return response.text.strip()
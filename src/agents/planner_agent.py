@@ -1,45 +1,15 @@
 #planner_agent.py
-import os
 import streamlit as st
-from datetime import datetime, timedelta
-import google.generativeai as genai
+from datetime import datetime, timedelta, date
+from functools import lru_cache
 import calendar
+from .llm_cache import cached_llm_call
+from .gemini_model import get_model
 
-class PlannerAgent:
-    def __init__(self):
-        """Initialize the Planner Agent with Gemini API."""
-        self.api_key = os.getenv("GOOGLE_API_KEY")
-        if not self.api_key:
-            raise ValueError("GOOGLE_API_KEY not found in environment variables")
-        
-        # Configure Gemini API
-        genai.configure(api_key=self.api_key)
-        
-        # Try to initialize with the best available model
-        try:
-            self.model = genai.GenerativeModel('gemini-1.5-flash')
-        except Exception:
-            try:
-                self.model = genai.GenerativeModel('gemini-1.5-pro')
-            except Exception:
-                try:
-                    self.model = genai.GenerativeModel('gemini-pro')
-                except Exception:
-                    available_models = genai.list_models()
-                    generative_models = [
-                        model for model in available_models 
-                        if 'generateContent' in model.supported_generation_methods
-                    ]
-                    if generative_models:
-                        model_name = generative_models[0].name.replace('models/', '')
-                        self.model = genai.GenerativeModel(model_name)
-                    else:
-                        raise ValueError("No suitable generative models available")
-    
-    def create_planner_prompt(self, topic: str, duration: str, daily_time: str, current_level: str, learning_style: str) -> str:
-        """Create a detailed prompt for generating study plan."""
-        
-        prompt = f"""
+# Marks where the generated plan goes when splitting the formatted output for streaming
+PLAN_PLACEHOLDER = "\x00PLAN\x00"
+
+PLANNER_PROMPT_TEMPLATE = """
         You are an expert educational planner and learning strategist. Create a comprehensive study plan based on the following requirements:
 
         **Learning Goal:** {topic}
@@ -71,18 +41,41 @@ class PlannerAgent:
 
         Please generate a detailed, actionable study plan now:
         """
-        
-        return prompt
+
+DURATION_DAYS = {
+    "1 Week": 7,
+    "2 Weeks": 14,
+    "1 Month": 30,
+    "3 Months": 90,
+    "6 Months": 180
+}
+
+@lru_cache(maxsize=8)
+def calendar_dates(days: int, start: date) -> tuple:
+    """Formatted (date, day name) pairs for consecutive days, cached per start date."""
+    dates = [start + timedelta(days=i) for i in range(days)]
+    return tuple((d.strftime("%B %d, %Y"), calendar.day_name[d.weekday()]) for d in dates)
+
+class PlannerAgent:
+    def __init__(self):
+        """Initialize the Planner Agent with Gemini API."""
+        # Shared Gemini model, configured once per process
+        self.model = get_model()
+    
+    def create_planner_prompt(self, topic: str, duration: str, daily_time: str, current_level: str, learning_style: str) -> str:
+        """Create a detailed prompt for generating study plan."""
+        return PLANNER_PROMPT_TEMPLATE.format(
+            topic=topic,
+            duration=duration,
+            daily_time=daily_time,
+            current_level=current_level,
+            learning_style=learning_style
+        )
     
     def generate_study_plan(self, prompt: str) -> str:
         """Generate study plan using Gemini API."""
         try:
-            response = self.model.generate_content(prompt)
-            
-            if not response.text:
-                raise Exception("Empty response from Gemini API")
-            
-            return response.text.strip()
+            return cached_llm_call(self.model, self.model.model_name, prompt)
         
         except Exception as e:
             if "API_KEY" in str(e):
@@ -92,6 +85,37 @@ class PlannerAgent:
             else:
                 raise Exception(f"Error generating study plan: {str(e)}")
     
+    def stream_study_plan_with_gemini(self, prompt: str):
+        """Stream study plan text from Gemini API as it is generated."""
+        try:
+            for chunk in self.model.generate_content(prompt, stream=True):
+                if chunk.text:
+                    yield chunk.text
+        
+        except Exception as e:
+            if "API_KEY" in str(e):
+                raise Exception("Invalid API key. Please check your Gemini API key.")
+            elif "quota" in str(e).lower():
+                raise Exception("API quota exceeded. Please try again later.")
+            else:
+                raise Exception(f"Error generating study plan: {str(e)}")
+    
+    def stream_study_plan(self, topic: str, duration: str, daily_time: str, current_level: str, learning_style: str):
+        """Stream the formatted study plan, yielding text as soon as Gemini produces it."""
+        try:
+            if not topic.strip():
+                raise Exception("Please enter a valid learning topic/goal")
+            
+            prompt = self.create_planner_prompt(topic, duration, daily_time, current_level, learning_style)
+            
+            header, footer = self.format_study_plan(PLAN_PLACEHOLDER, topic, duration, daily_time).split(PLAN_PLACEHOLDER)
+            yield header
+            yield from self.stream_study_plan_with_gemini(prompt)
+            yield footer
+        
+        except Exception as e:
+            raise Exception(f"Study plan creation failed: {str(e)}")
+    
     def create_study_plan(self, topic: str, duration: str, daily_time: str, current_level: str, learning_style: str) -> str:
         """Main method to create personalized study plan."""
         try:
@@ -146,26 +170,14 @@ class PlannerAgent:
     
     def get_calendar_view(self, duration: str) -> dict:
         """Generate calendar structure for the study plan duration."""
-        today = datetime.now()
-        duration_days = {
-            "1 Week": 7,
-            "2 Weeks": 14,
-            "1 Month": 30,
-            "3 Months": 90,
-            "6 Months": 180
-        }
+        days = DURATION_DAYS.get(duration, 30)
         
-        days = duration_days.get(duration, 30)
-        calendar_data = {}
-        
-        for i in range(days):
-            current_date = today + timedelta(days=i)
-            week_number = (i // 7) + 1
-            day_key = f"Week {week_number} - Day {(i % 7) + 1}"
-            calendar_data[day_key] = {
-                "date": current_date.strftime("%B %d, %Y"),
-                "day_name": current_date.strftime("%A"),
+        # Date strings are cached; each call still gets its own task lists
+        return {
+            f"Week {(i // 7) + 1} - Day {(i % 7) + 1}": {
+                "date": date_str,
+                "day_name": day_name,
                 "tasks": []
             }
-        
-        return calendar_data
\ No newline at end of file
+            for i, (date_str, day_name) in enumerate(calendar_dates(days, datetime.now().date()))
+        }
\ No newline at end of file
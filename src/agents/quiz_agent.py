@@ -1,41 +1,18 @@
 #quiz_agent.py 
-import os
 import streamlit as st
 from datetime import datetime
-import google.generativeai as genai
 import json
 import random
+import asyncio
+from itertools import zip_longest
+from .llm_cache import cached_llm_call
+from .gemini_model import get_model
 
 class QuizAgent:
     def __init__(self):
         """Initialize the Quiz Agent with Gemini API."""
-        self.api_key = os.getenv("GOOGLE_API_KEY")
-        if not self.api_key:
-            raise ValueError("GOOGLE_API_KEY not found in environment variables")
-        
-        # Configure Gemini API
-        genai.configure(api_key=self.api_key)
-        
-        # Try to initialize with the best available model
-        try:
-            self.model = genai.GenerativeModel('gemini-1.5-flash')
-        except Exception:
-            try:
-                self.model = genai.GenerativeModel('gemini-1.5-pro')
-            except Exception:
-                try:
-                    self.model = genai.GenerativeModel('gemini-pro')
-                except Exception:
-                    available_models = genai.list_models()
-                    generative_models = [
-                        model for model in available_models 
-                        if 'generateContent' in model.supported_generation_methods
-                    ]
-                    if generative_models:
-                        model_name = generative_models[0].name.replace('models/', '')
-                        self.model = genai.GenerativeModel(model_name)
-                    else:
-                        raise ValueError("No suitable generative models available")
+        # Shared Gemini model, configured once per process
+        self.model = get_model()
     
     def create_quiz_prompt(self, topic: str, num_questions: int, difficulty: str, question_types: list) -> str:
         """Create a detailed prompt for generating quiz questions."""
@@ -86,12 +63,21 @@ class QuizAgent:
     def generate_quiz_questions(self, prompt: str) -> str:
         """Generate quiz questions using Gemini API."""
         try:
-            response = self.model.generate_content(prompt)
-            
-            if not response.text:
-                raise Exception("Empty response from Gemini API")
-            
-            return response.text.strip()
+            return cached_llm_call(self.model, self.model.model_name, prompt)
+        
+        except Exception as e:
+            if "API_KEY" in str(e):
+                raise Exception("Invalid API key. Please check your Gemini API key.")
+            elif "quota" in str(e).lower():
+                raise Exception("API quota exceeded. Please try again later.")
+            else:
+                raise Exception(f"Error generating quiz: {str(e)}")
+    
+    async def agenerate_quiz_questions(self, prompt: str, semaphore: asyncio.Semaphore) -> str:
+        """Generate quiz questions asynchronously using Gemini API."""
+        try:
+            async with semaphore:
+                return await asyncio.to_thread(cached_llm_call, self.model, self.model.model_name, prompt)
         
         except Exception as e:
             if "API_KEY" in str(e):
@@ -120,6 +106,7 @@ class QuizAgent:
                     'question': line.split(':', 1)[1].strip() if ':' in line else line,
                     'type': '',
                     'options': [],
+                    'clean_options': [],
                     'correct_answer': '',
                     'explanation': ''
                 }
@@ -127,6 +114,7 @@ class QuizAgent:
                 current_question['type'] = line.split(':', 1)[1].strip()
             elif line.startswith(('A)', 'B)', 'C)', 'D)')):
                 current_question['options'].append(line)
+                current_question['clean_options'].append(line.split(')', 1)[1].strip())
             elif line.startswith('Correct Answer:'):
                 current_question['correct_answer'] = line.split(':', 1)[1].strip()
             elif line.startswith('Explanation:'):
@@ -142,7 +130,7 @@ class QuizAgent:
         
         return questions
     
-    def create_quiz(self, topic: str, num_questions: int, difficulty: str, question_types: list) -> list:
+    def create_quiz(self, topic: str, num_questions: int, difficulty: str, question_types: list) -> dict:
         """Main method to create quiz questions."""
         try:
             # Step 1: Validate inputs
@@ -167,15 +155,62 @@ class QuizAgent:
             if len(questions) == 0:
                 raise Exception("Failed to generate quiz questions. Please try again.")
             
-            return questions
+            return {'questions': questions, 'answer_key': self.build_answer_key(questions)}
+        
+        except Exception as e:
+            raise Exception(f"Quiz creation failed: {str(e)}")
+    
+    async def acreate_quiz(self, topic: str, num_questions: int, difficulty: str, question_types: list, max_concurrency: int = 8) -> dict:
+        """Create quiz questions with one concurrent Gemini request per question type."""
+        try:
+            # Step 1: Validate inputs
+            if not topic.strip():
+                raise Exception("Please enter a valid topic for the quiz")
+            
+            if num_questions < 1 or num_questions > 50:
+                raise Exception("Number of questions must be between 1 and 50")
+            
+            # Step 2: Split the questions across the selected types
+            st.info("🎯 Preparing quiz questions...")
+            base, extra = divmod(num_questions, len(question_types))
+            prompts = [
+                self.create_quiz_prompt(topic, base + (1 if i < extra else 0), difficulty, [question_type])
+                for i, question_type in enumerate(question_types)
+                if base + (1 if i < extra else 0) > 0
+            ]
+            
+            # Step 3: Generate all shards concurrently
+            st.info("❓ Generating quiz questions...")
+            semaphore = asyncio.Semaphore(max_concurrency)
+            responses = await asyncio.gather(*(self.agenerate_quiz_questions(prompt, semaphore) for prompt in prompts))
+            
+            # Step 4: Parse each shard and interleave the question types
+            st.info("📝 Processing quiz format...")
+            shards = [self.parse_quiz_response(response) for response in responses]
+            questions = [q for group in zip_longest(*shards) for q in group if q is not None]
+            
+            if len(questions) == 0:
+                raise Exception("Failed to generate quiz questions. Please try again.")
+            
+            return {'questions': questions, 'answer_key': self.build_answer_key(questions)}
         
         except Exception as e:
             raise Exception(f"Quiz creation failed: {str(e)}")
     
-    def calculate_score(self, questions: list, user_answers: dict) -> dict:
+    def build_answer_key(self, questions: list) -> dict:
+        """Precompute normalized correct answers keyed by form answer key (q_1, q_2, ...)."""
+        return {f"q_{i}": question['correct_answer'].strip().lower() for i, question in enumerate(questions, 1)}
+    
+    def calculate_score(self, questions: list, user_answers: dict, answer_key: dict = None) -> dict:
         """Calculate quiz score and generate performance report."""
+        if answer_key is None:
+            answer_key = self.build_answer_key(questions)
+        
         total_questions = len(questions)
-        correct_answers = 0
+        correct_answers = sum(
+            1 for key, answer in answer_key.items()
+            if user_answers.get(key, "").strip().lower() == answer
+        )
         detailed_results = []
         
         for i, question in enumerate(questions):
@@ -183,9 +218,7 @@ class QuizAgent:
             user_answer = user_answers.get(f"q_{question_num}", "")
             correct_answer = question['correct_answer']
             
-            is_correct = user_answer.strip().lower() == correct_answer.strip().lower()
-            if is_correct:
-                correct_answers += 1
+            is_correct = user_answer.strip().lower() == answer_key[f"q_{question_num}"]
             
             detailed_results.append({
                 'question_num': question_num,
@@ -1,45 +1,25 @@
 #summary_agent.py
-import os
-import tempfile
 import streamlit as st
 from typing import Optional
 import google.generativeai as genai
 from PyPDF2 import PdfReader
 from docx import Document
 import io
+import asyncio
+from .llm_cache import cached_llm_call
+from .gemini_model import get_model
+
+# Documents longer than this are summarized chunk by chunk and then merged
+MAX_CHUNK_WORDS = 8000
+
+# Marks where the generated summary goes when splitting the formatted output for streaming
+SUMMARY_PLACEHOLDER = "\x00SUMMARY\x00"
 
 class SummarizerAgent:
     def __init__(self):
         """Initialize the Summarizer Agent with Gemini API."""
-        self.api_key = os.getenv("GOOGLE_API_KEY")
-        if not self.api_key:
-            raise ValueError("GOOGLE_API_KEY not found in environment variables")
-        
-        # Configure Gemini API
-        genai.configure(api_key=self.api_key)
-        
-        # Try to initialize with the best available model
-        try:
-            self.model = genai.GenerativeModel('gemini-1.5-flash')
-        except Exception:
-            try:
-                # Fallback to other available models
-                self.model = genai.GenerativeModel('gemini-1.5-pro')
-            except Exception:
-                try:
-                    self.model = genai.GenerativeModel('gemini-pro')
-                except Exception:
-                    # Get list of available models and use the first generative one
-                    available_models = genai.list_models()
-                    generative_models = [
-                        model for model in available_models 
-                        if 'generateContent' in model.supported_generation_methods
-                    ]
-                    if generative_models:
-                        model_name = generative_models[0].name.replace('models/', '')
-                        self.model = genai.GenerativeModel(model_name)
-                    else:
-                        raise ValueError("No suitable generative models available")
+        # Shared Gemini model, configured once per process
+        self.model = get_model()
     
     def list_available_models(self):
         """List all available Gemini models for debugging."""
@@ -53,10 +33,7 @@ class SummarizerAgent:
         """Extract text from PDF file."""
         try:
             pdf_reader = PdfReader(file)
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-            return text.strip()
+            return "\n".join(page.extract_text() or "" for page in pdf_reader.pages).strip()
         except Exception as e:
             raise Exception(f"Error reading PDF: {str(e)}")
     
@@ -64,10 +41,7 @@ class SummarizerAgent:
         """Extract text from DOCX file."""
         try:
             doc = Document(file)
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            return text.strip()
+            return "\n".join(paragraph.text for paragraph in doc.paragraphs).strip()
         except Exception as e:
             raise Exception(f"Error reading DOCX: {str(e)}")
     
@@ -79,29 +53,20 @@ class SummarizerAgent:
         if uploaded_file.size > 10 * 1024 * 1024:
             raise Exception("File size exceeds 10MB limit")
         
-        # Create a temporary file
-        with tempfile.NamedTemporaryFile(delete=False) as tmp_file:
-            tmp_file.write(uploaded_file.read())
-            tmp_file_path = tmp_file.name
+        # Read the upload into memory; PdfReader and python-docx both accept file-like objects
+        buffer = io.BytesIO(uploaded_file.read())
         
-        try:
-            if file_type == "application/pdf":
-                with open(tmp_file_path, 'rb') as file:
-                    text = self.extract_text_from_pdf(file)
-            elif file_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-                text = self.extract_text_from_docx(tmp_file_path)
-            else:
-                raise Exception(f"Unsupported file type: {file_type}")
-            
-            if not text.strip():
-                raise Exception("No text content found in the document")
-            
-            return text
+        if file_type == "application/pdf":
+            text = self.extract_text_from_pdf(buffer)
+        elif file_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
+            text = self.extract_text_from_docx(buffer)
+        else:
+            raise Exception(f"Unsupported file type: {file_type}")
+        
+        if not text.strip():
+            raise Exception("No text content found in the document")
         
-        finally:
-            # Clean up temporary file
-            if os.path.exists(tmp_file_path):
-                os.unlink(tmp_file_path)
+        return text
     
     def create_summary_prompt(self, text: str, summary_length: str, focus_area: str) -> str:
         """Create a detailed prompt for Gemini based on user preferences."""
@@ -156,12 +121,36 @@ class SummarizerAgent:
     def generate_summary_with_gemini(self, prompt: str) -> str:
         """Generate summary using Gemini API."""
         try:
-            response = self.model.generate_content(prompt)
-            
-            if not response.text:
-                raise Exception("Empty response from Gemini API")
-            
-            return response.text.strip()
+            return cached_llm_call(self.model, self.model.model_name, prompt)
+        
+        except Exception as e:
+            if "API_KEY" in str(e):
+                raise Exception("Invalid API key. Please check your Gemini API key.")
+            elif "quota" in str(e).lower():
+                raise Exception("API quota exceeded. Please try again later.")
+            else:
+                raise Exception(f"Error generating summary: {str(e)}")
+    
+    async def agenerate_summary_with_gemini(self, prompt: str, semaphore: asyncio.Semaphore) -> str:
+        """Generate summary asynchronously using Gemini API."""
+        try:
+            async with semaphore:
+                return await asyncio.to_thread(cached_llm_call, self.model, self.model.model_name, prompt)
+        
+        except Exception as e:
+            if "API_KEY" in str(e):
+                raise Exception("Invalid API key. Please check your Gemini API key.")
+            elif "quota" in str(e).lower():
+                raise Exception("API quota exceeded. Please try again later.")
+            else:
+                raise Exception(f"Error generating summary: {str(e)}")
+    
+    def stream_summary_with_gemini(self, prompt: str):
+        """Stream summary text from Gemini API as it is generated."""
+        try:
+            for chunk in self.model.generate_content(prompt, stream=True):
+                if chunk.text:
+                    yield chunk.text
         
         except Exception as e:
             if "API_KEY" in str(e):
@@ -171,12 +160,93 @@ class SummarizerAgent:
             else:
                 raise Exception(f"Error generating summary: {str(e)}")
     
-    def summarize_document(self, uploaded_file, summary_length: str, focus_area: str) -> str:
+    def chunk_text(self, text: str, max_words: int = MAX_CHUNK_WORDS) -> list:
+        """Split document text into word-bounded chunks that fit a single request."""
+        words = text.split()
+        return [" ".join(words[i:i + max_words]) for i in range(0, len(words), max_words)]
+    
+    def create_merge_prompt(self, partial_summaries: list, summary_length: str, focus_area: str) -> str:
+        """Create a prompt that merges per-chunk summaries into one final summary."""
+        combined = "\n\n".join(
+            f"Section {i} summary:\n{partial}" for i, partial in enumerate(partial_summaries, 1)
+        )
+        return self.create_summary_prompt(combined, summary_length, focus_area)
+    
+    async def asummarize_chunks(self, chunks: list, summary_length: str, focus_area: str, max_concurrency: int = 8) -> list:
+        """Summarize document chunks concurrently, bounded by a semaphore."""
+        semaphore = asyncio.Semaphore(max_concurrency)
+        return await asyncio.gather(*(
+            self.agenerate_summary_with_gemini(
+                self.create_summary_prompt(chunk, summary_length, focus_area), semaphore
+            )
+            for chunk in chunks
+        ))
+    
+    async def asummarize_document(self, uploaded_file, summary_length: str, focus_area: str, max_concurrency: int = 8, text: Optional[str] = None) -> str:
+        """Summarize a document by summarizing its chunks concurrently and merging the results."""
+        try:
+            # Step 1: Extract text from document (unless already extracted)
+            if text is None:
+                st.info("📄 Extracting text from document...")
+                text = self.extract_text_from_file(uploaded_file)
+            
+            # Check if text is too short
+            if len(text.split()) < 50:
+                raise Exception("Document too short to generate meaningful summary (minimum 50 words required)")
+            
+            # Step 2: Split into chunks that fit one request
+            st.info("🤖 Preparing summary request...")
+            chunks = self.chunk_text(text)
+            semaphore = asyncio.Semaphore(max_concurrency)
+            
+            # Step 3: Summarize all chunks in parallel, then merge
+            st.info("✨ Generating intelligent summary...")
+            if len(chunks) == 1:
+                prompt = self.create_summary_prompt(chunks[0], summary_length, focus_area)
+                summary = await self.agenerate_summary_with_gemini(prompt, semaphore)
+            else:
+                partial_summaries = await self.asummarize_chunks(chunks, summary_length, focus_area, max_concurrency)
+                merge_prompt = self.create_merge_prompt(partial_summaries, summary_length, focus_area)
+                summary = await self.agenerate_summary_with_gemini(merge_prompt, semaphore)
+            
+            # Step 4: Format summary
+            return self.format_summary(summary, uploaded_file.name)
+        
+        except Exception as e:
+            raise Exception(f"Summarization failed: {str(e)}")
+    
+    def stream_summarize(self, uploaded_file, summary_length: str, focus_area: str, text: Optional[str] = None, max_concurrency: int = 8):
+        """Stream the formatted summary, yielding text as soon as Gemini produces it."""
+        try:
+            if text is None:
+                text = self.extract_text_from_file(uploaded_file)
+            
+            if len(text.split()) < 50:
+                raise Exception("Document too short to generate meaningful summary (minimum 50 words required)")
+            
+            chunks = self.chunk_text(text)
+            if len(chunks) == 1:
+                prompt = self.create_summary_prompt(chunks[0], summary_length, focus_area)
+            else:
+                # Long documents: summarize chunks concurrently, then stream the merge step
+                partial_summaries = asyncio.run(self.asummarize_chunks(chunks, summary_length, focus_area, max_concurrency))
+                prompt = self.create_merge_prompt(partial_summaries, summary_length, focus_area)
+            
+            header, footer = self.format_summary(SUMMARY_PLACEHOLDER, uploaded_file.name).split(SUMMARY_PLACEHOLDER)
+            yield header
+            yield from self.stream_summary_with_gemini(prompt)
+            yield footer
+        
+        except Exception as e:
+            raise Exception(f"Summarization failed: {str(e)}")
+    
+    def summarize_document(self, uploaded_file, summary_length: str, focus_area: str, text: Optional[str] = None) -> str:
         """Main method to summarize uploaded document."""
         try:
-            # Step 1: Extract text from document
-            st.info("📄 Extracting text from document...")
-            text = self.extract_text_from_file(uploaded_file)
+            # Step 1: Extract text from document (unless already extracted)
+            if text is None:
+                st.info("📄 Extracting text from document...")
+                text = self.extract_text_from_file(uploaded_file)
             
             # Check if text is too short
             if len(text.split()) < 50:
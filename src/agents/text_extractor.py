@@ -0,0 +1,75 @@
+# text_extractor.py
+import io
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import streamlit as st
+import pypdfium2 as pdfium
+from docx import Document
+
+MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB upload limit
+
+# Parallel PDF extraction: worker processes to use, and the page count below which it isn't worth it
+PDF_EXTRACT_CONCURRENCY = int(os.getenv("PDF_EXTRACT_CONCURRENCY", os.cpu_count() or 1))
+PARALLEL_MIN_PAGES = 16
+
+@st.cache_resource
+def get_pdf_pool() -> ProcessPoolExecutor:
+    """Shared process pool for PDF extraction (PDFium is not thread-safe, so pages are split across processes)."""
+    return ProcessPoolExecutor(max_workers=PDF_EXTRACT_CONCURRENCY, mp_context=multiprocessing.get_context("spawn"))
+
+def extract_page_range(data: bytes, start: int, stop: int) -> str:
+    """Extract text from pages [start, stop) of a PDF given as bytes."""
+    pdf = pdfium.PdfDocument(data)
+    try:
+        return "\n".join(pdf[i].get_textpage().get_text_range() for i in range(start, stop))
+    finally:
+        pdf.close()
+
+def extract_text_from_pdf(file) -> str:
+    """Extract text from a PDF path, bytes or file-like object using PDFium."""
+    try:
+        pdf = pdfium.PdfDocument(file)
+        try:
+            num_pages = len(pdf)
+            if not isinstance(file, bytes) or PDF_EXTRACT_CONCURRENCY < 2 or num_pages < PARALLEL_MIN_PAGES:
+                return "\n".join(page.get_textpage().get_text_range() for page in pdf).strip()
+        finally:
+            pdf.close()
+
+        # Large PDF: each worker opens its own document and extracts a contiguous page range
+        step = -(-num_pages // PDF_EXTRACT_CONCURRENCY)
+        starts = range(0, num_pages, step)
+        texts = get_pdf_pool().map(
+            extract_page_range,
+            [file] * len(starts), starts, [min(start + step, num_pages) for start in starts]
+        )
+        return "\n".join(texts).strip()
+    except Exception as e:
+        raise Exception(f"Error reading PDF: {str(e)}")
+
+def extract_text_from_docx(file) -> str:
+    """Extract text from a DOCX file or file-like object."""
+    try:
+        doc = Document(file)
+        return "\n".join(paragraph.text for paragraph in doc.paragraphs).strip()
+    except Exception as e:
+        raise Exception(f"Error reading DOCX: {str(e)}")
+
+@st.cache_data(show_spinner=False, ttl=24 * 60 * 60)
+def extract_text(file_bytes: bytes, file_name: str) -> str:
+    """Extract text from uploaded PDF/DOCX bytes, cached on the file content."""
+    if len(file_bytes) > MAX_FILE_SIZE:
+        raise Exception("File size exceeds 10MB limit")
+
+    if file_name.lower().endswith(".pdf"):
+        text = extract_text_from_pdf(file_bytes)
+    elif file_name.lower().endswith(".docx"):
+        text = extract_text_from_docx(io.BytesIO(file_bytes))
+    else:
+        raise Exception(f"Unsupported file type: {file_name}")
+
+    if not text.strip():
+        raise Exception("No text content found in the document")
+
+    return text
@@ -12,7 +12,10 @@ import pandas as pd
 class TrackerAgent:
     def __init__(self):
         """Initialize the Progress Tracker Agent."""
-        # Initialize session state for tracking data
+        self.init_session_state()
+    
+    def init_session_state(self):
+        """Initialize per-session tracking data (the agent itself is shared across sessions)."""
         if 'study_progress' not in st.session_state:
             st.session_state.study_progress = {
                 'daily_tasks': {},  # Format: {date: {task_id: completion_status}}
@@ -382,6 +385,8 @@ Generated by EduMate AI Assistant
     
     def display_tracker_interface(self):
         """Main interface for the progress tracker."""
+        self.init_session_state()
+        
         st.markdown("### 🎯 Study Progress Tracker")
         st.markdown("Track your learning journey, monitor progress, and celebrate achievements!")
         